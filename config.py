@@ -2,6 +2,7 @@
 Конфигурация приложения String Storage API
 """
 
+import functools
 import os
 from typing import Dict, Any
 
@@ -16,18 +17,39 @@ class Config:
     # Настройки сервера
     HOST = '0.0.0.0'
     PORT = 5000
+    THREADS = 8  # Потоки WSGI-сервера waitress
     
     # Настройки базы данных
     DATABASE_PATH = 'strings.db'
     
+    # Максимальная длина сохраняемой строки
+    MAX_DATA_LENGTH = 1 << 20
+    
+    # Предел размера тела запроса для Flask/Werkzeug: до 6 байт на символ
+    # (экранирование \uXXXX в JSON) плюс запас на обвязку.
+    # Больший запрос отклоняется с 413 до разбора
+    MAX_CONTENT_LENGTH = 6 * MAX_DATA_LENGTH + (64 << 10)
+    
+    # Максимальное количество строк в одном запросе /store_batch
+    MAX_BATCH_SIZE = 1000
+    
+    # Максимальная суммарная длина строк в одном запросе /store_batch
+    MAX_BATCH_BYTES = 4 * MAX_DATA_LENGTH
+    
+    # Размер страницы списка индексов по умолчанию и его предел
+    LIST_PAGE_SIZE = 100
+    MAX_LIST_LIMIT = 1000
+    
     # Настройки логирования
     LOG_LEVEL = 'INFO'
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def get_config_dict(cls) -> Dict[str, Any]:
         """
-        Возвращает словарь с конфигурацией
+        Возвращает словарь с конфигурацией (кэшируется для каждого класса,
+        изменять возвращаемый словарь нельзя)
         
         Returns:
             Dict с параметрами конфигурации
@@ -37,7 +59,13 @@ class Config:
             'testing': cls.TESTING,
             'host': cls.HOST,
             'port': cls.PORT,
+            'threads': cls.THREADS,
             'database_path': cls.DATABASE_PATH,
+            'max_data_length': cls.MAX_DATA_LENGTH,
+            'max_batch_size': cls.MAX_BATCH_SIZE,
+            'max_batch_bytes': cls.MAX_BATCH_BYTES,
+            'list_page_size': cls.LIST_PAGE_SIZE,
+            'max_list_limit': cls.MAX_LIST_LIMIT,
             'log_level': cls.LOG_LEVEL,
             'log_format': cls.LOG_FORMAT
         }
@@ -88,7 +116,18 @@ def get_config(config_name: str = None) -> Config:
     Returns:
         Класс конфигурации
     """
-    if config_name is None:
-        config_name = os.getenv('FLASK_ENV', 'default')
+    return _get_config_cached(config_name or os.environ.get('FLASK_ENV', 'default'))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_config_cached(config_name: str) -> Config:
+    """
+    Поиск класса конфигурации с кэшированием по имени
     
-    return config_map.get(config_name, DevelopmentConfig)
\ No newline at end of file
+    Args:
+        config_name: Имя конфигурации
+        
+    Returns:
+        Класс конфигурации
+    """
+    return config_map.get(config_name, DevelopmentConfig)
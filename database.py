@@ -2,42 +2,183 @@
 Модуль для работы с базой данных SQLite
 """
 
+import atexit
+import queue
 import sqlite3
 import os
-from typing import Optional, List, Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime
 
 
+# SQL-запросы вынесены в константы: один и тот же текст запроса
+# попадает в кэш подготовленных выражений sqlite3 при каждом вызове
+_SQL_CREATE_TABLE = (
+    'CREATE TABLE IF NOT EXISTS strings ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'index_key TEXT UNIQUE NOT NULL, '
+    'data TEXT NOT NULL, '
+    'data_length INTEGER NOT NULL DEFAULT 0, '
+    'created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, '
+    'updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'
+)
+# Покрывающий индекс: список индексов читается без обращения к страницам data
+_SQL_CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS idx_strings_listing '
+    'ON strings (created_at DESC, index_key DESC, updated_at, data_length)'
+)
+_SQL_ADD_DATA_LENGTH = 'ALTER TABLE strings ADD COLUMN data_length INTEGER NOT NULL DEFAULT 0'
+_SQL_FILL_DATA_LENGTH = 'UPDATE strings SET data_length = LENGTH(data)'
+_SQL_UPSERT = (
+    'INSERT INTO strings (index_key, data, data_length) VALUES (?1, ?2, LENGTH(?2)) '
+    'ON CONFLICT(index_key) DO UPDATE SET data = excluded.data, '
+    'data_length = excluded.data_length, updated_at = CURRENT_TIMESTAMP'
+)
+_SQL_INSERT_NEW = (
+    'INSERT INTO strings (index_key, data, data_length) VALUES (?1, ?2, LENGTH(?2)) '
+    'ON CONFLICT(index_key) DO NOTHING'
+)
+_SQL_UPDATE = (
+    'UPDATE strings SET data = ?2, data_length = LENGTH(?2), updated_at = CURRENT_TIMESTAMP '
+    'WHERE index_key = ?1'
+)
+_SQL_SELECT_ONE = 'SELECT index_key, data, created_at, updated_at FROM strings WHERE index_key = ?'
+_SQL_SELECT_LIST = (
+    'SELECT index_key, created_at, updated_at, data_length '
+    'FROM strings ORDER BY created_at DESC, index_key DESC LIMIT ?'
+)
+_SQL_SELECT_LIST_AFTER = (
+    'SELECT index_key, created_at, updated_at, data_length '
+    'FROM strings WHERE (created_at, index_key) < (?, ?) '
+    'ORDER BY created_at DESC, index_key DESC LIMIT ?'
+)
+_SQL_DELETE = 'DELETE FROM strings WHERE index_key = ?'
+_SQL_STATS = (
+    'SELECT COUNT(*) AS count, COALESCE(SUM(data_length), 0) AS total_size, '
+    '(SELECT index_key FROM strings ORDER BY created_at DESC LIMIT 1) AS latest_index, '
+    '(SELECT MAX(created_at) FROM strings) AS latest_created_at '
+    'FROM strings'
+)
+
+# Шаблоны сообщений о результате сохранения
+_MSG_CREATED = 'Строка сохранена под индексом "{}"'
+_MSG_UPDATED = 'Строка обновлена под индексом "{}"'
+
+# Размер, до которого обрезается -wal файл после контрольной точки, байт;
+# соответствует wal_autocheckpoint по умолчанию (1000 страниц по 4 КиБ)
+_WAL_SIZE_LIMIT = 4 << 20
+
+# Размер кэша подготовленных выражений на подключение
+_CACHED_STATEMENTS = 256
+
+
 class DatabaseManager:
     """Класс для управления базой данных"""
     
-    def __init__(self, database_path: str = 'strings.db'):
+    # Количество подключений только для чтения в пуле
+    READER_POOL_SIZE = 4
+    
+    def __init__(self, database_path: str = 'strings.db', readers: int = READER_POOL_SIZE):
         self.database_path = database_path
+        
+        # Одно подключение на запись и пул подключений на чтение (1W/NR).
+        # Долгоживущие подключения сохраняют кэш страниц SQLite между запросами
+        self._writer = self._connect()
+        self._writer_lock = threading.Lock()
+        
         self.init_database()
+        
+        # Каждое подключение к ':memory:' открывает отдельную базу,
+        # поэтому для неё чтение идет через подключение на запись
+        self._readers: queue.Queue = queue.Queue()
+        if self.database_path != ':memory:':
+            for _ in range(readers):
+                self._readers.put(self._connect(query_only=True))
+        
+        atexit.register(self.close)
+    
+    def _connect(self, query_only: bool = False) -> sqlite3.Connection:
+        """Открытие подключения с настройками производительности"""
+        conn = sqlite3.connect(
+            self.database_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-64000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        if query_only:
+            conn.execute('PRAGMA query_only=1')
+        return conn
+    
+    @contextmanager
+    def _read_conn(self) -> Iterator[sqlite3.Connection]:
+        """Получение подключения на чтение из пула"""
+        if self.database_path == ':memory:':
+            with self._writer_lock:
+                yield self._writer
+            return
+        
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    @contextmanager
+    def _write_conn(self) -> Iterator[sqlite3.Connection]:
+        """
+        Получение подключения на запись внутри транзакции BEGIN IMMEDIATE
+        
+        Блокировка на запись берется сразу, а не при первом изменении,
+        поэтому транзакция не получает SQLITE_BUSY посреди работы
+        """
+        with self._writer_lock:
+            self._writer.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._writer
+                self._writer.execute('COMMIT')
+            except BaseException:
+                # SQLite мог уже откатить транзакцию сам (SQLITE_FULL, SQLITE_IOERR)
+                if self._writer.in_transaction:
+                    self._writer.execute('ROLLBACK')
+                raise
     
     def init_database(self) -> None:
         """Инициализация базы данных и создание таблиц"""
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS strings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                index_key TEXT UNIQUE NOT NULL,
-                data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._writer_lock:
+            # WAL позволяет читателям не блокироваться писателем;
+            # к базе в памяти не применим
+            if self.database_path != ':memory:':
+                self._writer.execute('PRAGMA journal_mode=WAL')
+                # Автоматические контрольные точки при фиксации переиспользуют
+                # -wal файл; после них писатель обрезает его до этого размера
+                self._writer.execute(f'PRAGMA journal_size_limit={_WAL_SIZE_LIMIT}')
+        
+        with self._write_conn() as conn:
+            conn.execute(_SQL_CREATE_TABLE)
+            
+            # Миграция баз, созданных до появления столбца data_length
+            columns = [row['name'] for row in conn.execute('PRAGMA table_info(strings)')]
+            if 'data_length' not in columns:
+                conn.execute(_SQL_ADD_DATA_LENGTH)
+                conn.execute(_SQL_FILL_DATA_LENGTH)
+            
+            conn.execute(_SQL_CREATE_INDEX)
     
-    def get_connection(self) -> sqlite3.Connection:
-        """Получение подключения к базе данных"""
-        conn = sqlite3.connect(self.database_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def close(self) -> None:
+        """Закрытие всех подключений к базе данных"""
+        # Обработчик atexit больше не нужен и не должен удерживать менеджер
+        atexit.unregister(self.close)
+        
+        with self._writer_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
     
     def store_string(self, index: str, data: str) -> Dict[str, Any]:
         """
@@ -50,45 +191,44 @@ class DatabaseManager:
         Returns:
             Dict с информацией о результате операции
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self._write_conn() as conn:
+            # Вставка пропускается при существующем индексе - тогда обновляем
+            created = conn.execute(_SQL_INSERT_NEW, (index, data)).rowcount > 0
+            if not created:
+                conn.execute(_SQL_UPDATE, (index, data))
         
-        try:
-            # Пытаемся вставить новую запись
-            cursor.execute('''
-                INSERT INTO strings (index_key, data) 
-                VALUES (?, ?)
-            ''', (index, data))
-            
-            result = {
+        if created:
+            return {
                 'action': 'created',
-                'message': f'Строка сохранена под индексом "{index}"',
-                'status_code': 201
-            }
-            
-        except sqlite3.IntegrityError:
-            # Если индекс уже существует, обновляем запись
-            cursor.execute('''
-                UPDATE strings 
-                SET data = ?, updated_at = CURRENT_TIMESTAMP 
-                WHERE index_key = ?
-            ''', (data, index))
-            
-            result = {
-                'action': 'updated',
-                'message': f'Строка обновлена под индексом "{index}"',
-                'status_code': 200
+                'message': _MSG_CREATED.format(index),
+                'status_code': 201,
+                'index': index,
+                'length': len(data)
             }
         
-        conn.commit()
-        conn.close()
-        
-        result.update({
+        return {
+            'action': 'updated',
+            'message': _MSG_UPDATED.format(index),
+            'status_code': 200,
             'index': index,
             'length': len(data)
-        })
+        }
+    
+    def store_many(self, items: List[Tuple[str, str]]) -> int:
+        """
+        Сохранение или обновление нескольких строк в одной транзакции
+        
+        Args:
+            items: Список пар (индекс, данные)
+            
+        Returns:
+            Количество обработанных записей
+        """
+        # Одна транзакция на весь пакет - одна фиксация вместо len(items)
+        with self._write_conn() as conn:
+            conn.executemany(_SQL_UPSERT, items)
         
-        return result
+        return len(items)
     
     def get_string(self, index: str) -> Optional[Dict[str, Any]]:
         """
@@ -100,17 +240,9 @@ class DatabaseManager:
         Returns:
             Dict с данными записи или None если не найдена
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT index_key, data, created_at, updated_at 
-            FROM strings 
-            WHERE index_key = ?
-        ''', (index,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with self._read_conn() as conn:
+            cursor = conn.execute(_SQL_SELECT_ONE, (index,))
+            row = cursor.fetchone()
         
         if row is None:
             return None
@@ -132,42 +264,33 @@ class DatabaseManager:
         Returns:
             True если запись была удалена, False если не найдена
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self._write_conn() as conn:
+            cursor = conn.execute(_SQL_DELETE, (index,))
         
-        # Проверяем существование записи
-        cursor.execute('SELECT COUNT(*) FROM strings WHERE index_key = ?', (index,))
-        count = cursor.fetchone()[0]
-        
-        if count == 0:
-            conn.close()
-            return False
-        
-        # Удаляем запись
-        cursor.execute('DELETE FROM strings WHERE index_key = ?', (index,))
-        conn.commit()
-        conn.close()
-        
-        return True
+        return cursor.rowcount > 0
     
-    def list_all_indices(self) -> List[Dict[str, Any]]:
+    def list_all_indices(
+        self,
+        limit: int = 100,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Получение списка всех индексов с метаданными
+        Получение страницы индексов с метаданными, от новых к старым
         
+        Args:
+            limit: Максимальное количество записей
+            after: Пара (created_at, index) последней записи предыдущей страницы
+            
         Returns:
             List словарей с информацией о записях
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT index_key, created_at, updated_at, LENGTH(data) as data_length
-            FROM strings 
-            ORDER BY created_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
+        # Keyset-пагинация: диапазонное чтение покрывающего индекса без OFFSET
+        with self._read_conn() as conn:
+            if after is None:
+                cursor = conn.execute(_SQL_SELECT_LIST, (limit,))
+            else:
+                cursor = conn.execute(_SQL_SELECT_LIST_AFTER, (after[0], after[1], limit))
+            rows = cursor.fetchall()
         
         indices = []
         for row in rows:
@@ -180,6 +303,29 @@ class DatabaseManager:
         
         return indices
     
+    def list_all_indices_iter(self, chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Ленивый обход всех индексов с метаданными, от новых к старым
+        
+        Записи читаются keyset-страницами, и подключение на чтение
+        возвращается в пул между страницами, а не удерживается,
+        пока клиент получает ответ
+        
+        Args:
+            chunk_size: Количество записей, читаемых за один запрос
+            
+        Yields:
+            Dict с информацией о записи
+        """
+        after = None
+        while True:
+            indices = self.list_all_indices(chunk_size, after)
+            yield from indices
+            
+            if len(indices) < chunk_size:
+                return
+            after = (indices[-1]['created_at'], indices[-1]['index'])
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Получение статистики базы данных
@@ -187,39 +333,21 @@ class DatabaseManager:
         Returns:
             Dict со статистикой
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Общее количество записей
-        cursor.execute('SELECT COUNT(*) as count FROM strings')
-        total_count = cursor.fetchone()['count']
-        
-        # Общий размер данных
-        cursor.execute('SELECT SUM(LENGTH(data)) as total_size FROM strings')
-        total_size = cursor.fetchone()['total_size'] or 0
-        
-        # Последняя запись
-        cursor.execute('''
-            SELECT index_key, created_at 
-            FROM strings 
-            ORDER BY created_at DESC 
-            LIMIT 1
-        ''')
-        latest = cursor.fetchone()
-        
-        conn.close()
+        # Количество, размер и последняя запись одним запросом
+        with self._read_conn() as conn:
+            row = conn.execute(_SQL_STATS).fetchone()
         
         stats = {
-            'total_records': total_count,
-            'total_data_size': total_size,
+            'total_records': row['count'],
+            'total_data_size': row['total_size'],
             'database_file': self.database_path,
             'database_exists': os.path.exists(self.database_path)
         }
         
-        if latest:
+        if row['latest_index'] is not None:
             stats['latest_record'] = {
-                'index': latest['index_key'],
-                'created_at': latest['created_at']
+                'index': row['latest_index'],
+                'created_at': row['latest_created_at']
             }
         
-        return stats
\ No newline at end of file
+        return stats
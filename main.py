@@ -1,13 +1,24 @@
 """
 Главный файл приложения String Storage API
+
+В production приложение обслуживается waitress с пулом потоков.
+Запуск под gunicorn (один процесс, чтобы пул подключений SQLite был общим):
+    gunicorn -k gthread --threads 8 -w 1 'main:create_app()'
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from flask import Flask
 from routes import api_bp
 from config import get_config
 from database import DatabaseManager
+from typing import Optional
+
+# QueueListener, запущенный setup_logging
+_log_listener: Optional[logging.handlers.QueueListener] = None
 
 
 def create_app(config_name: str = None) -> Flask:
@@ -26,7 +37,11 @@ def create_app(config_name: str = None) -> Flask:
     config = get_config(config_name)
     
     # Настраиваем логирование
-    setup_logging(config.LOG_LEVEL, config.LOG_FORMAT)
+    log_listener = setup_logging(config.LOG_LEVEL, config.LOG_FORMAT)
+    app.extensions['log_listener'] = log_listener
+    
+    # Один менеджер базы данных на приложение, общий для всех запросов
+    app.extensions['db'] = DatabaseManager(config.DATABASE_PATH)
     
     # Регистрируем Blueprint с API маршрутами
     app.register_blueprint(api_bp)
@@ -34,29 +49,55 @@ def create_app(config_name: str = None) -> Flask:
     # Сохраняем конфигурацию в контексте приложения
     app.config.update(config.get_config_dict())
     
+    # Flask читает этот параметр только под именем в верхнем регистре
+    app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
+    
     return app
 
 
-def setup_logging(log_level: str, log_format: str) -> None:
+def setup_logging(log_level: str, log_format: str) -> Optional[logging.handlers.QueueListener]:
     """
     Настройка системы логирования
     
+    Записи только помещаются в очередь, а вывод в консоль и файл
+    выполняет фоновый поток QueueListener. Повторный вызов не создает
+    новых обработчиков и потоков
+    
     Args:
         log_level: Уровень логирования
         log_format: Формат сообщений
+        
+    Returns:
+        Запущенный QueueListener или None, если логирование
+        уже было настроено без него
     """
+    global _log_listener
+    
     numeric_level = getattr(logging, log_level.upper(), None)
     if not isinstance(numeric_level, int):
         raise ValueError(f'Неверный уровень логирования: {log_level}')
     
+    # basicConfig не изменяет уже настроенный корневой логгер
+    if _log_listener is not None or logging.getLogger().handlers:
+        return _log_listener
+    
+    log_queue = queue.Queue(-1)
+    
     logging.basicConfig(
         level=numeric_level,
         format=log_format,
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('app.log')
-        ]
+        handlers=[logging.handlers.QueueHandler(log_queue)]
     )
+    
+    _log_listener = logging.handlers.QueueListener(
+        log_queue,
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler('app.log')
+    )
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    return _log_listener
 
 
 def print_startup_info(config) -> None:
@@ -72,6 +113,7 @@ def print_startup_info(config) -> None:
     print(f"База данных: {config.DATABASE_PATH}")
     print(f"Режим отладки: {'Включен' if config.DEBUG else 'Отключен'}")
     print(f"Адрес сервера: http://{config.HOST}:{config.PORT}")
+    print(f"Сервер: {'Flask dev' if config.DEBUG else f'waitress, потоков: {config.THREADS}'}")
 
 
 def main():
@@ -80,8 +122,8 @@ def main():
     app = create_app()
     config = get_config()
     
-    # Инициализируем базу данных
-    db_manager = DatabaseManager(config.DATABASE_PATH)
+    # База данных уже инициализирована в create_app
+    db_manager = app.extensions['db']
     
     # Выводим информацию о запуске
     print_startup_info(config)
@@ -90,15 +132,20 @@ def main():
     logger = logging.getLogger(__name__)
     logger.info("Запуск String Storage API")
     logger.info(f"Конфигурация: {config.__class__.__name__}")
-    logger.info(f"База данных: {config.DATABASE_PATH}")
+    logger.info(f"База данных: {db_manager.database_path}")
     
     try:
         # Запускаем приложение
-        app.run(
-            host=config.HOST,
-            port=config.PORT,
-            debug=config.DEBUG
-        )
+        if config.DEBUG:
+            app.run(
+                host=config.HOST,
+                port=config.PORT,
+                debug=config.DEBUG
+            )
+        else:
+            # Dev-сервер Flask обрабатывает запросы по одному
+            from waitress import serve
+            serve(app, host=config.HOST, port=config.PORT, threads=config.THREADS)
     except KeyboardInterrupt:
         logger.info("Приложение остановлено пользователем")
     except Exception as e:
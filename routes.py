@@ -2,18 +2,27 @@
 API маршруты для String Storage приложения
 """
 
-from flask import Blueprint, request, jsonify
+import orjson
+from flask import Blueprint, Response, request, current_app, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from database import DatabaseManager
-from typing import Tuple, Dict, Any
+from typing import Dict, Any, Iterable, Iterator
 
 # Создаем Blueprint для API маршрутов
 api_bp = Blueprint('api', __name__)
 
-# Инициализируем менеджер базы данных
-db_manager = DatabaseManager()
+
+def get_db() -> DatabaseManager:
+    """
+    Получение менеджера базы данных текущего приложения
+    
+    Returns:
+        DatabaseManager, созданный в create_app
+    """
+    return current_app.extensions['db']
 
 
-def create_error_response(message: str, status_code: int) -> Tuple[Dict[str, str], int]:
+def create_error_response(message: str, status_code: int) -> Response:
     """
     Создание стандартизированного ответа об ошибке
     
@@ -22,12 +31,12 @@ def create_error_response(message: str, status_code: int) -> Tuple[Dict[str, str
         status_code: HTTP код ошибки
         
     Returns:
-        Tuple с JSON ответом и статус кодом
+        Response с JSON телом и статус кодом
     """
-    return jsonify({'error': message}), status_code
+    return Response(orjson.dumps({'error': message}), status=status_code, mimetype='application/json')
 
 
-def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Tuple[Dict[str, Any], int]:
+def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Response:
     """
     Создание стандартизированного успешного ответа
     
@@ -36,32 +45,120 @@ def create_success_response(data: Dict[str, Any], status_code: int = 200) -> Tup
         status_code: HTTP код успеха
         
     Returns:
-        Tuple с JSON ответом и статус кодом
+        Response с JSON телом и статус кодом
+    """
+    # orjson сериализует сразу в bytes и значительно быстрее stdlib json
+    return Response(orjson.dumps(data), status=status_code, mimetype='application/json')
+
+
+def iter_ndjson(rows: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Сериализация записей в NDJSON по одной строке на запись
+    
+    Args:
+        rows: Записи для сериализации
+        
+    Returns:
+        Iterator со строками NDJSON
     """
-    return jsonify(data), status_code
+    for row in rows:
+        yield orjson.dumps(row) + b'\n'
 
 
 @api_bp.route('/store', methods=['POST'])
 def store_string():
     """
-    Сохраняет строку под индексом из параметров запроса
-    Параметры: ?index=<значение>&data=<строка>
+    Сохраняет строку под индексом из JSON тела запроса
+    Тело: {"index": "<значение>", "data": "<строка>"}
+    Устаревший вариант: ?index=<значение>&data=<строка>
     """
     try:
-        # Получаем параметры из запроса
-        index = request.args.get('index')
-        if index is None:
+        # JSON тело не проходит через URL-декодирование и MultiDict
+        if request.is_json:
+            args = request.get_json(silent=True, cache=False)
+            if not isinstance(args, dict):
+                return create_error_response('Тело запроса должно быть JSON объектом', 400)
+        else:
+            args = request.args
+        
+        index = args.get('index')
+        if not isinstance(index, str):
             return create_error_response('Параметр index не найден', 400)
         
-        data = request.args.get('data')
-        if not data:
+        data = args.get('data')
+        if not data or not isinstance(data, str):
             return create_error_response('Параметр data не найден или пустой', 400)
         
+        max_length = current_app.config['max_data_length']
+        if len(data) > max_length:
+            return create_error_response(f'Параметр data длиннее {max_length} символов', 413)
+        
         # Сохраняем в базе данных
-        result = db_manager.store_string(index, data)
+        result = get_db().store_string(index, data)
         
         return create_success_response(result, result['status_code'])
     
+    except RequestEntityTooLarge:
+        return create_error_response('Тело запроса слишком большое', 413)
+    
+    except Exception as e:
+        return create_error_response(str(e), 500)
+
+
+@api_bp.route('/store_batch', methods=['POST'])
+def store_batch():
+    """
+    Сохраняет несколько строк одной транзакцией
+    Тело: [{"index": "<значение>", "data": "<строка>"}, ...]
+    """
+    try:
+        payload = request.get_json(silent=True, cache=False)
+        if not isinstance(payload, list) or not payload:
+            return create_error_response('Тело запроса должно быть непустым JSON массивом', 400)
+        
+        # Пакет пишется одной транзакцией под блокировкой записи
+        max_batch_size = current_app.config['max_batch_size']
+        if len(payload) > max_batch_size:
+            return create_error_response(f'Пакет содержит больше {max_batch_size} строк', 413)
+        
+        max_length = current_app.config['max_data_length']
+        max_batch_bytes = current_app.config['max_batch_bytes']
+        total_length = 0
+        items = []
+        for position, item in enumerate(payload):
+            if not isinstance(item, dict):
+                return create_error_response(f'Элемент {position} должен быть JSON объектом', 400)
+            
+            index = item.get('index')
+            if not isinstance(index, str):
+                return create_error_response(f'Параметр index не найден в элементе {position}', 400)
+            
+            data = item.get('data')
+            if not data or not isinstance(data, str):
+                return create_error_response(f'Параметр data не найден или пустой в элементе {position}', 400)
+            
+            if len(data) > max_length:
+                return create_error_response(f'Параметр data длиннее {max_length} символов в элементе {position}', 413)
+            
+            total_length += len(data)
+            if total_length > max_batch_bytes:
+                return create_error_response(f'Суммарная длина строк в пакете больше {max_batch_bytes} символов', 413)
+            
+            items.append((index, data))
+        
+        # Сохраняем в базе данных
+        count = get_db().store_many(items)
+        
+        response_data = {
+            'message': f'Сохранено строк: {count}',
+            'count': count
+        }
+        
+        return create_success_response(response_data)
+    
+    except RequestEntityTooLarge:
+        return create_error_response('Тело запроса слишком большое', 413)
+    
     except Exception as e:
         return create_error_response(str(e), 500)
 
@@ -79,7 +176,7 @@ def get_string():
             return create_error_response('Параметр index не найден', 400)
         
         # Получаем данные из базы
-        result = db_manager.get_string(index)
+        result = get_db().get_string(index)
         
         if result is None:
             return create_error_response(f'Строка с индексом "{index}" не найдена', 404)
@@ -93,14 +190,39 @@ def get_string():
 @api_bp.route('/list', methods=['GET'])
 def list_indices():
     """
-    Возвращает список всех доступных индексов
+    Возвращает страницу индексов, от новых к старым
+    Параметры: ?limit=<количество>&after=<значение next предыдущей страницы>
     """
     try:
-        indices = db_manager.list_all_indices()
+        args = request.args
+        
+        try:
+            limit = int(args.get('limit', current_app.config['list_page_size']))
+        except ValueError:
+            return create_error_response('Параметр limit должен быть целым числом', 400)
+        if limit < 1:
+            return create_error_response('Параметр limit должен быть положительным', 400)
+        limit = min(limit, current_app.config['max_list_limit'])
+        
+        # Курсор страницы: "<created_at>,<index>"
+        after = args.get('after')
+        if after is not None:
+            created_at, separator, index = after.partition(',')
+            if not separator:
+                return create_error_response('Параметр after должен иметь вид <created_at>,<index>', 400)
+            after = (created_at, index)
+        
+        indices = get_db().list_all_indices(limit, after)
+        
+        next_page = None
+        if len(indices) == limit:
+            last = indices[-1]
+            next_page = f"{last['created_at']},{last['index']}"
         
         response_data = {
             'indices': indices,
-            'count': len(indices)
+            'count': len(indices),
+            'next': next_page
         }
         
         return create_success_response(response_data)
@@ -109,6 +231,19 @@ def list_indices():
         return create_error_response(str(e), 500)
 
 
+@api_bp.route('/list/stream', methods=['GET'])
+def stream_indices():
+    """
+    Потоково возвращает все индексы в формате NDJSON, от новых к старым
+    """
+    try:
+        rows = get_db().list_all_indices_iter()
+        return Response(stream_with_context(iter_ndjson(rows)), mimetype='application/x-ndjson')
+    
+    except Exception as e:
+        return create_error_response(str(e), 500)
+
+
 @api_bp.route('/delete', methods=['DELETE'])
 def delete_string():
     """
@@ -122,7 +257,7 @@ def delete_string():
             return create_error_response('Параметр index не найден', 400)
         
         # Удаляем из базы данных
-        success = db_manager.delete_string(index)
+        success = get_db().delete_string(index)
         
         if not success:
             return create_error_response(f'Строка с индексом "{index}" не найдена', 404)
@@ -143,7 +278,7 @@ def get_stats():
     Статистика базы данных
     """
     try:
-        stats = db_manager.get_statistics()
+        stats = get_db().get_statistics()
         return create_success_response(stats)
     
     except Exception as e:
@@ -157,15 +292,18 @@ def info():
     """
     info_data = {
         'message': 'String Storage API with SQLite',
-        'database': db_manager.database_path,
+        'database': get_db().database_path,
         'endpoints': {
-            'POST /store?index=<key>&data=<value>': 'Сохранить строку',
+            'POST /store {"index": <key>, "data": <value>}': 'Сохранить строку',
+            'POST /store_batch [{"index": <key>, "data": <value>}, ...]': 'Сохранить несколько строк',
             'GET /get?index=<key>': 'Получить строку',
-            'GET /list': 'Список всех индексов с метаданными',
+            'GET /list?limit=<n>&after=<next>': 'Страница индексов с метаданными',
+            'GET /list/stream': 'Все индексы с метаданными в формате NDJSON',
             'DELETE /delete?index=<key>': 'Удалить строку',
             'GET /stats': 'Статистика базы данных'
         },
-        'usage': 'Используйте параметры запроса index и data'
+        'usage': 'Используйте параметр запроса index; /store принимает index и data в JSON теле',
+        'migration': 'POST /store?index=<key>&data=<value> устарел, передавайте JSON с Content-Type: application/json'
     }
     
     return create_success_response(info_data)
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Тесты DatabaseManager
+"""
+
+import unittest
+
+from database import DatabaseManager
+
+
+class StoreStringTest(unittest.TestCase):
+    """Определение созданной или обновленной записи в store_string"""
+    
+    def setUp(self):
+        self.db = DatabaseManager(':memory:')
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def test_created_then_updated(self):
+        self.assertEqual(self.db.store_string('a', '1')['action'], 'created')
+        self.assertEqual(self.db.store_string('a', '22')['action'], 'updated')
+        self.assertEqual(self.db.get_string('a')['data'], '22')
+    
+    def test_new_key_after_rolled_back_batch_is_created(self):
+        # Откат пакета не должен приводить к ответу 'updated' для нового индекса
+        with self.assertRaises(Exception):
+            self.db.store_many([('x', 'a'), ('y', None)])
+        
+        result = self.db.store_string('z', 'q')
+        self.assertEqual(result['action'], 'created')
+        self.assertEqual(result['status_code'], 201)
+        self.assertIsNone(self.db.get_string('x'))
+
+
+class ListAllIndicesTest(unittest.TestCase):
+    """Keyset-пагинация list_all_indices"""
+    
+    def setUp(self):
+        self.db = DatabaseManager(':memory:')
+        # Индексы с запятыми и одинаковым created_at у нескольких записей подряд
+        self.keys = [f'k,{i:02}' for i in range(23)]
+        self.db.store_many([(key, 'x') for key in self.keys])
+        with self.db._write_conn() as conn:
+            conn.execute("UPDATE strings SET created_at = '2026-01-01 00:00:00' WHERE index_key < 'k,10'")
+            conn.execute("UPDATE strings SET created_at = '2026-01-02 00:00:00' WHERE index_key >= 'k,10'")
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def test_pages_neither_overlap_nor_skip(self):
+        seen = []
+        after = None
+        while True:
+            page = self.db.list_all_indices(4, after)
+            self.assertLessEqual(len(page), 4)
+            seen.extend(row['index'] for row in page)
+            if len(page) < 4:
+                break
+            after = (page[-1]['created_at'], page[-1]['index'])
+        
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(sorted(seen), sorted(self.keys))
+        # От новых к старым, внутри одного created_at - по убыванию индекса
+        expected = sorted(self.keys[10:], reverse=True) + sorted(self.keys[:10], reverse=True)
+        self.assertEqual(seen, expected)
+    
+    def test_cursor_with_comma_in_index(self):
+        first = self.db.list_all_indices(3)
+        
+        # Курсор /list имеет вид "<created_at>,<index>"; created_at запятых не содержит
+        cursor = f"{first[-1]['created_at']},{first[-1]['index']}"
+        created_at, _, index = cursor.partition(',')
+        second = self.db.list_all_indices(3, (created_at, index))
+        
+        self.assertEqual(first[-1]['index'], 'k,20')
+        self.assertEqual([row['index'] for row in second], ['k,19', 'k,18', 'k,17'])
+
+
+class ListIndicesIterTest(unittest.TestCase):
+    """Потоковый обход индексов"""
+    
+    def setUp(self):
+        self.db = DatabaseManager(':memory:')
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def test_open_stream_does_not_block_writes(self):
+        self.db.store_many([(f'k{i:02}', 'x') for i in range(25)])
+        
+        stream = self.db.list_all_indices_iter(chunk_size=10)
+        next(stream)
+        self.assertEqual(self.db.store_string('new', 'y')['action'], 'created')
+        
+        indices = [row['index'] for row in self.db.list_all_indices_iter(chunk_size=10)]
+        self.assertEqual(len(indices), 26)
+        self.assertEqual(len(set(indices)), 26)
+
+
+if __name__ == '__main__':
+    unittest.main()